@@ -13,6 +13,7 @@ setup(name='python-vimeo',
       download_url = 'http://github.com/mishk/python-vimeo',
       license='MIT',
       packages=['vimeo', 'vimeo.httplib2wrap'],
+      scripts=['bin/vimeo-export'],
       requires=['httplib2', 'oauth2'],
       classifiers = [
           'Development Status :: 4 - Beta',
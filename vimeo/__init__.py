@@ -129,6 +129,14 @@ class FormatProcessor(object):
         self.content = content
         return self.content
 
+    def process_content(self, root, content):
+        """
+        Called with the name of the response's root node and its content once
+        the response envelope has been stripped. Returns the content unchanged
+        by default, but subclasses can override it to transform the result.
+        """
+        return content
+
 class JSONProcessor(FormatProcessor):
     """
     JSON API processor.
@@ -154,8 +162,8 @@ class JSONProcessor(FormatProcessor):
             self.log.error("Unexpected response contained {0}".format(
                                                     self._processing.keys()))
             return self._processing
-        _, processed_content = self._processing.popitem()
-        return processed_content
+        root, processed_content = self._processing.popitem()
+        return self.process_content(root, processed_content)
 
     def get_error_msg(self):
         return self._processing["err"].get("msg", None)
@@ -207,7 +215,7 @@ class XMLProcessor(FormatProcessor):
         self.generated_in = self._processing.get("generated_in")
 
         processed_content = self._processing[0]
-        return processed_content
+        return self.process_content(processed_content.tag, processed_content)
 
     def get_error_msg(self):
         return self._processing[0].get("msg", None)
@@ -240,25 +248,52 @@ class VimeoClient(object):
     By default, this client will cache API requests for 120 seconds. To
     override this setting, pass in a different cache_timeout parameter (in
     seconds), or to disable caching, set cache_timeout to 0.
+
+    With the JSON format (and compact off), video listings that support the
+    summary_response and full_response flags can be fetched as summaries by
+    passing lean=True (to the initializer, or as an additional parameter to
+    a single call).
+    Their videos are upgraded to full detail the first time a field missing
+    from the summary is accessed (see vimeo.lazy).
+
+    Requests are made through a transport (see vimeo.transport), which can be
+    passed in to record or replay traffic.
+
+    To keep the memory used by cached responses down, pass compact=True.
+    Videos, users, albums, channels and thumbnails (and pages of them) will
+    then be returned as the compact records defined in vimeo.records instead
+    of dicts or ElementTrees, and those records are what gets cached.
     """
 
     _CLIENT_HEADERS = DEFAULT_HEADERS
     _NO_CACHE = ("vimeo_videos_upload_getTicket",
                  "vimeo_videos_upload_getQuota")
-    _processors = {"JSON" : JSONProcessor(),
-                   "JSONP" : JSONPProcessor(),
-                   "PHP" : PHPProcessor(),
-                   "XML" : XMLProcessor()}
+    # processors keep state while processing, so a new one is made per call
+    _processors = {"JSON" : JSONProcessor,
+                   "JSONP" : JSONPProcessor,
+                   "PHP" : PHPProcessor,
+                   "XML" : XMLProcessor}
 
     def __init__(self, key=VIMEO_KEY, secret=VIMEO_SECRET, format="xml",
                  token=None, token_secret=None, verifier=None,
-                 cache_timeout=120):
+                 cache_timeout=120, compact=False, transport=None,
+                 lean=False):
 
         # memoizing
         self._cache = {}
         self._timeouts = {}
         self.cache_timeout = cache_timeout
         self.default_response_format = format
+        self.lean = lean
+
+        if compact:
+            from records import COMPACT_PROCESSORS
+            self._processors = dict(self._processors, **COMPACT_PROCESSORS)
+
+        if transport is None:
+            from transport import Transport
+            transport = Transport()
+        self.transport = transport
 
         self.key = key
         self.secret = secret
@@ -274,7 +309,14 @@ class VimeoClient(object):
         else:
             self.token = None
 
-        self.client = oauth2.Client(self.consumer, self.token)
+        self.client = self._new_client()
+
+    def _new_client(self):
+        """
+        Creates the client used to sign and send requests with the current
+        token.
+        """
+        return oauth2.Client(self.consumer, self.token)
 
     def __getattr__(self, name):
         """
@@ -306,16 +348,27 @@ class VimeoClient(object):
         # no iteritems, we're changing the dict
         for k, v in self._timeouts.items():
             if call_time - v > self.cache_timeout:
-                try:
-                    del self._cache[k]
-                except KeyError:
-                    pass
-                del self._timeouts[k]
+                # pop rather than del, another thread may have got here first
+                self._cache.pop(k, None)
+                self._timeouts.pop(k, None)
 
         def _do_vimeo_call(**params):
             # change these before we memoize
             params.setdefault("format", self.default_response_format)
 
+            lean = params.pop("lean", self.lean)
+            if lean:
+                from lazy import LEAN_METHODS, make_lazy
+                # only plain JSON responses can be made lazy (not XML, nor
+                # the compact records)
+                processor = self._processors.get(params["format"].upper())
+                lean = (name in LEAN_METHODS and
+                        processor is JSONProcessor and
+                        "full_response" not in params)
+            if lean:
+                params.setdefault("summary_response", 1)
+                lean_params = dict(params)
+
             # memoize
             key = (name, frozenset(params.items()))
             if not name in self._NO_CACHE:
@@ -329,16 +382,23 @@ class VimeoClient(object):
 
             request_uri = "{api_url}?&{params}".format(api_url=API_REST_URL,
                                                       params=urlencode(params))
-            headers, content = self.client.request(uri=request_uri,
-                                                 headers=self._CLIENT_HEADERS)
+            send = lambda : self.client.request(uri=request_uri,
+                                                headers=self._CLIENT_HEADERS)
+            headers, content = self.transport.request("api", "GET",
+                                                      API_REST_URL, params,
+                                                      send,
+                                                      self._CLIENT_HEADERS)
 
             # call the appropriate process method if process is True (default)
             # and we have an appropriate processor method
             processor = self._processors.get(params["format"].upper(),
-                                             FormatProcessor())
+                                             FormatProcessor)()
+            processed = processor(headers, content)
+            if lean:
+                processed = make_lazy(self, name, lean_params, processed)
             if name in self._NO_CACHE:
-                return processor(headers, content)
-            return self._cache.setdefault(key, processor(headers, content))
+                return processed
+            return self._cache.setdefault(key, processed)
         return _do_vimeo_call
 
     def __repr__(self):
@@ -399,7 +459,7 @@ class VimeoClient(object):
             new_token = dict(urlparse.parse_qsl(content))
             self.token = oauth2.Token(new_token["oauth_token"],
                                       new_token["oauth_token_secret"])
-            self.client = oauth2.Client(self.consumer, self.token)
+            self.client = self._new_client()
 
     def get_request_token(self):
         """
@@ -432,7 +492,7 @@ class VimeoClient(object):
         if not self.token:
             raise VimeoError("No request token present.")
         self.token.set_verifier(verifier)
-        self.client = oauth2.Client(self.consumer, self.token)
+        self.client = self._new_client()
 
     def get_access_token(self):
         """
@@ -467,3 +527,21 @@ class VimeoClient(object):
         ticket = self.vimeo_videos_upload_getTicket(format="json")
         return VimeoUploader(vimeo_client=self, ticket=ticket, quota=quota,
                              *args, **kwargs)
+
+    def upload_file(self, file_path, upload_index=None, **upload_kwargs):
+        """
+        Uploads and completes a file in one go, returning the new video's id.
+
+        If an UploadIndex (see the convenience module) is passed in, it's
+        checked before asking for a ticket, and if it already holds a file
+        with the same content, that video's id is returned without uploading
+        anything. Otherwise the file is added to the index once it's done.
+        """
+        if upload_index is not None:
+            video_id = upload_index.lookup(file_path)
+            if video_id is not None:
+                return video_id
+
+        uploader = self.get_uploader(upload_index=upload_index)
+        uploader.upload(file_path, **upload_kwargs)
+        return uploader.complete().get("video_id")
@@ -1,3 +1,3 @@
 def progress_bar(chunk_info):
-    completed = (chunk_info["chunk_id"] + 1) * chunk_info["chunk_size"]
-    print completed // chunk_info["total_size"] * 100, "%"
+    completed = chunk_info["bytes_sent"]
+    print completed * 100 // chunk_info["total_size"], "%"
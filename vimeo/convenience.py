@@ -8,9 +8,20 @@ shouldn't completely break either until Vimeo seriously changes their API, keep
 in mind that if something in this module doesn't work, it still might work the
 "conventional" way using just the base module.
 """
-from os.path import getsize
+from os import rename
+from os.path import exists, getsize
 from cStringIO import StringIO
 from urllib import urlencode
+import hashlib
+import Queue
+import threading
+import time
+
+try:
+    # python 2.6
+    import json
+except ImportError:
+    import simplejson as json
 
 import urllib2
 import oauth2
@@ -18,12 +29,188 @@ import oauth2
 from . import VimeoClient, VimeoError, API_REST_URL
 from httplib2wrap import Http
 
+class UploadIndex(object):
+    """
+    A local index of uploaded files, mapping each file's size and content hash
+    to the id of the video it became, so that the same file isn't uploaded
+    twice.
+
+    If a path is given, the index is loaded from that file (if it exists) and
+    saved back to it whenever a new upload is added.
+
+    Files are only hashed up front by lookup if the index already holds a file
+    of the same size. Otherwise, the hash is computed by the uploader as it
+    reads the file for uploading, and is added to the index on completion.
+    """
+    def __init__(self, path=None, hash_name="sha1"):
+        self.path = path
+        self.hash_name = hash_name
+        self._lock = threading.Lock()
+        self._videos = {}
+
+        if path is not None and exists(path):
+            with open(path) as index_file:
+                self._videos = json.load(index_file)
+        self._sizes = set(int(key.partition(":")[0]) for key in self._videos)
+
+    def __len__(self):
+        return len(self._videos)
+
+    def _key(self, size, digest):
+        return "{0}:{1}".format(size, digest)
+
+    def new_hash(self):
+        """
+        Returns a new hash object of the kind used by this index.
+        """
+        return hashlib.new(self.hash_name)
+
+    def hash_file(self, file_path, block_size=1024*1024):
+        content_hash = self.new_hash()
+        with open(file_path, "rb") as hashed_file:
+            block = hashed_file.read(block_size)
+            while block:
+                content_hash.update(block)
+                block = hashed_file.read(block_size)
+        return content_hash.hexdigest()
+
+    def lookup(self, file_path):
+        """
+        Returns the id of the video previously uploaded from a file with the
+        same content, or None.
+        """
+        size = getsize(file_path)
+        if size not in self._sizes:
+            return None
+        return self._videos.get(self._key(size, self.hash_file(file_path)))
+
+    def add(self, size, digest, video_id):
+        """
+        Records that the file with the given size and digest was uploaded as
+        the given video.
+        """
+        with self._lock:
+            self._videos[self._key(size, digest)] = video_id
+            self._sizes.add(size)
+            if self.path is not None:
+                self.save()
+
+    def save(self):
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as index_file:
+            json.dump(self._videos, index_file)
+        rename(temp_path, self.path)
+
+
+class RateLimiter(object):
+    """
+    A token bucket allowing an average of rate units (e.g. bytes) per second,
+    with bursts of up to burst units (by default, a second's worth).
+
+    Safe to share between threads.
+    """
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else rate)
+        self._available = self.burst
+        self._updated = time.time()
+        self._lock = threading.Lock()
+
+    def consume(self, amount=1):
+        """
+        Uses up amount units, first blocking for as long as needed to stay
+        within the rate.
+        """
+        with self._lock:
+            now = time.time()
+            self._available = min(self.burst, self._available +
+                                  (now - self._updated) * self.rate)
+            self._updated = now
+            self._available -= amount
+            wait = max(0, -self._available / self.rate)
+        if wait:
+            time.sleep(wait)
+
+
+class ChunkSizer(object):
+    """
+    Picks chunk sizes for an adaptive upload.
+
+    Aims for each chunk to take about target_time seconds to post, based on
+    the throughput of the last one. Since that throughput includes the
+    per-request latency, fast links end up with bigger chunks (fewer round
+    trips) and slow links with smaller ones (less to resend if one fails).
+    The size changes by at most a factor of two per chunk and stays within
+    min_size and max_size.
+    """
+    def __init__(self, chunk_size, min_size, max_size, target_time=5.0):
+        self.min_size = min_size
+        self.max_size = max(min_size, max_size)
+        self.target_time = target_time
+        self.size = self._bounded(chunk_size)
+
+    def _bounded(self, size):
+        return int(min(self.max_size, max(self.min_size, size)))
+
+    def record(self, sent, elapsed):
+        """
+        Records that sent bytes took elapsed seconds to post, and returns the
+        size to use for the next chunk.
+        """
+        if elapsed > 0:
+            ideal = sent / elapsed * self.target_time
+            self.size = self._bounded(min(max(ideal, self.size / 2),
+                                          self.size * 2))
+        return self.size
+
+
+class _HashingFile(object):
+    """
+    Wraps a file, updating a hash with everything read from it.
+    """
+    def __init__(self, wrapped_file, content_hash):
+        self.wrapped_file = wrapped_file
+        self.content_hash = content_hash
+        self.name = getattr(wrapped_file, "name", "fileobject")
+
+    def read(self, *args):
+        data = self.wrapped_file.read(*args)
+        self.content_hash.update(data)
+        return data
+
+    def close(self):
+        self.wrapped_file.close()
+
+
+def _verified_chunks(verified):
+    """
+    Returns the sorted (id, size) pairs of the chunks in a verifyChunks
+    response (a JSON dict or an XML element), or None if it can't be read.
+    """
+    if isinstance(verified, dict):
+        chunks = verified.get("chunks") or {}
+        if isinstance(chunks, dict):
+            chunks = chunks.get("chunk", [])
+        if isinstance(chunks, dict):
+            chunks = [chunks]
+        pairs = [(chunk.get("id"), chunk.get("size")) for chunk in chunks]
+    elif hasattr(verified, "findall"):
+        pairs = [(chunk.get("id"), chunk.get("size"))
+                 for chunk in verified.findall("chunks/chunk")]
+    else:
+        return None
+    return sorted((int(chunk_id), int(size)) for chunk_id, size in pairs)
+
+
 class VimeoUploader(object):
     """
     A convenience uploader class to be used alongside a client.
 
     The ticket is assumed to be a dict-like object, which means that if you
     aren't using a JSON client the ticket will need to be converted first.
+
+    If an UploadIndex is passed in as upload_index, the uploaded file is
+    hashed while it's being uploaded and added to the index on completion.
     """
     def __init__(self, vimeo_client, ticket, **kwargs):
         self.vimeo_client = vimeo_client
@@ -31,6 +218,10 @@ class VimeoUploader(object):
         self.ticket_id = ticket["id"]
         self.max_file_size = ticket["max_file_size"]
         self.chunk_id = 0
+        self.chunk_sizes = []
+
+        self.upload_index = kwargs.pop("upload_index", None)
+        self.file_size, self.digest = None, None
 
         self.user = getattr(vimeo_client, "user", None)
 
@@ -45,7 +236,7 @@ class VimeoUploader(object):
         elif file_size > self.max_file_size:
             raise VimeoError("File is larger than the maximum allowed size.")
 
-    def _post_to_endpoint(self, open_file, **kwargs):
+    def _post_to_endpoint(self, open_file, body_size=None, **kwargs):
         params = {"chunk_id" : self.chunk_id,
                   "ticket_id" : self.ticket_id}
 
@@ -64,44 +255,287 @@ class VimeoUploader(object):
                              self.vimeo_client.token)
 
         # httplib2 doesn't support uploading out of the box, so use our wrap
-        return Http().request_with_files(url=self.endpoint,
+        send = lambda : Http().request_with_files(
+                                         url=self.endpoint,
                                          method="POST",
                                          body=request,
                                          body_files={"file_data" : open_file},
                                          headers=headers)
+        return self.vimeo_client.transport.request("upload", "POST",
+                                                   self.endpoint, params,
+                                                   send, headers, body_size)
+
+    def _verify_chunks(self):
+        """
+        Asks the API which chunks it received, and checks them against the
+        ids and sizes of the chunks that were sent.
+        """
+        verified = self.vimeo_client.vimeo_videos_upload_verifyChunks(
+                                                ticket_id=self.ticket_id)
+        received = _verified_chunks(verified)
+        if received is not None and \
+           received != list(enumerate(self.chunk_sizes)):
+            raise VimeoError(
+                "Uploaded chunks {0} don't match the chunks sent {1}.".format(
+                                    received, list(enumerate(self.chunk_sizes))))
+        return verified
 
     def upload(self, file_path, chunk=False, chunk_size=2*1024*1024,
-               chunk_complete_hook=lambda chunk_info : None):
+               chunk_complete_hook=lambda chunk_info : None, throttle=None,
+               adaptive=False, min_chunk_size=256*1024,
+               max_chunk_size=64*1024*1024):
         """
         Performs the steps of an upload. Checks file size and can handle
         splitting into chunks.
+
+        If given, throttle is called with the number of bytes about to be
+        sent before each post (e.g. a RateLimiter's consume method).
+
+        If adaptive is True (when chunking), chunk_size is only the size of
+        the first chunk. The size of each following chunk is picked by a
+        ChunkSizer based on how quickly the previous ones went through,
+        staying between min_chunk_size and max_chunk_size (and never above
+        the ticket's max_file_size). The chunk_info passed to
+        chunk_complete_hook has the size of the chunk that was actually sent.
+
+        Once the file is sent, the chunks are verified, and a VimeoError is
+        raised if the ids and sizes of the chunks the API received don't
+        match those that were sent (kept in chunk_sizes). Otherwise the
+        verification response is returned.
         """
 
         file_size = getsize(file_path)
         self._check_file_size(file_size)
 
+        content_hash = None
+        if self.upload_index is not None:
+            content_hash = self.upload_index.new_hash()
+
         if chunk:
+            sizer = None
+            if adaptive:
+                sizer = ChunkSizer(chunk_size, min_size=min_chunk_size,
+                                   max_size=min(max_chunk_size,
+                                                int(self.max_file_size)))
+                chunk_size = sizer.size
+
+            bytes_sent = 0
             with open(file_path) as video:
                 this_chunk = video.read(chunk_size)
                 while this_chunk:
+                    sent = len(this_chunk)
+                    if content_hash is not None:
+                        content_hash.update(this_chunk)
+                    if throttle is not None:
+                        throttle(sent)
                     this_chunk = StringIO(this_chunk)
-                    self._post_to_endpoint(this_chunk)
+                    started = time.time()
+                    self._post_to_endpoint(this_chunk, sent)
+                    if sizer is not None:
+                        chunk_size = sizer.record(sent, time.time() - started)
+                    bytes_sent += sent
+                    self.chunk_sizes.append(sent)
 
                     chunk_info = {"total_size" : file_size,
-                                  "chunk_size" : chunk_size,
+                                  "chunk_size" : sent,
+                                  "bytes_sent" : bytes_sent,
                                   "chunk_id" : self.chunk_id,
                                   "file" : file_path}
                     chunk_complete_hook(chunk_info)
                     self.chunk_id += 1
                     this_chunk = video.read(chunk_size)
         else:
-            self._post_to_endpoint(open(file_path))
-        return self.vimeo_client.vimeo_videos_upload_verifyChunks(
-                                                ticket_id=self.ticket_id)
+            video = open(file_path)
+            if content_hash is not None:
+                video = _HashingFile(video, content_hash)
+            if throttle is not None:
+                throttle(file_size)
+            self._post_to_endpoint(video, file_size)
+            self.chunk_sizes.append(file_size)
+
+        if content_hash is not None:
+            self.file_size, self.digest = file_size, content_hash.hexdigest()
+        return self._verify_chunks()
 
     def complete(self):
         """
         Finish an upload.
         """
-        return self.vimeo_client.vimeo_videos_upload_complete(
+        completed = self.vimeo_client.vimeo_videos_upload_complete(
                                                 ticket_id=self.ticket_id)
+        if self.upload_index is not None and self.digest is not None:
+            # works for both a JSON dict and an XML element
+            video_id = completed.get("video_id")
+            if video_id is not None:
+                self.upload_index.add(self.file_size, self.digest, video_id)
+        return completed
+
+
+class UploadManager(object):
+    """
+    Uploads many files, running a number of uploads at once.
+
+    The quota is fetched once when the uploads start, and the free upload
+    space is then tracked locally as files finish, so that a file that won't
+    fit fails without asking for a ticket. Files are uploaded in the order
+    given by order, which can be one of:
+
+        smallest (default): smallest files first
+        largest:            largest files first
+        priority:           highest priority first, then smallest first
+        fifo:               in the order they were added
+
+    max_bandwidth (in bytes per second) caps the combined rate of all of the
+    uploads, and upload_index can be an UploadIndex used to skip files that
+    were already uploaded. Any other keyword arguments are passed along to
+    VimeoUploader.upload (chunked uploading is on by default, since the
+    bandwidth cap is applied per chunk).
+
+    Each upload runs with its own client built from the given client's
+    credentials, since clients shouldn't be shared between threads.
+    """
+
+    ORDERS = {"smallest" : lambda job : (job["size"],),
+              "largest" : lambda job : (-job["size"],),
+              "priority" : lambda job : (-job["priority"], job["size"]),
+              "fifo" : lambda job : ()}
+
+    def __init__(self, vimeo_client, concurrency=2, max_bandwidth=None,
+                 order="smallest", upload_index=None,
+                 job_complete_hook=lambda job : None, **upload_kwargs):
+        if order not in self.ORDERS:
+            raise VimeoError("Unknown upload order {0}.".format(order))
+
+        self.vimeo_client = vimeo_client
+        self.concurrency = concurrency
+        self.order = order
+        self.upload_index = upload_index
+        self.job_complete_hook = job_complete_hook
+
+        upload_kwargs.setdefault("chunk", True)
+        if max_bandwidth:
+            upload_kwargs["throttle"] = RateLimiter(max_bandwidth).consume
+        self.upload_kwargs = upload_kwargs
+
+        self.jobs = []
+        self.quota = None
+        self.free_space = None
+        self.bytes_uploaded = 0
+        self.elapsed = None
+
+        self._queue = Queue.PriorityQueue()
+        self._reserved = 0
+        self._lock = threading.Lock()
+
+    def add(self, file_path, priority=0):
+        """
+        Queues up a file to be uploaded. Returns the job, a dict which will
+        hold the video_id (or the error) once the file is done.
+        """
+        job = {"file" : file_path,
+               "size" : getsize(file_path),
+               "priority" : priority,
+               "video_id" : None,
+               "duplicate" : False,
+               "error" : None,
+               "elapsed" : None}
+        self.jobs.append(job)
+        sort_key = self.ORDERS[self.order](job)
+        self._queue.put((sort_key, len(self.jobs), job))
+        return job
+
+    def run(self):
+        """
+        Uploads all of the queued files, blocking until they're done, and
+        returns the jobs.
+        """
+        self.quota = self.vimeo_client.vimeo_videos_upload_getQuota(
+                                                                format="json")
+        free = self.quota.get("upload_space", {}).get("free", None)
+        if free is not None:
+            self.free_space = int(free)
+
+        start = time.time()
+        workers = [threading.Thread(target=self._work)
+                   for _ in range(self.concurrency)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.elapsed = time.time() - start
+        return self.jobs
+
+    @property
+    def stats(self):
+        """
+        Aggregate numbers for the uploads so far.
+        """
+        elapsed = self.elapsed or 0
+        return {"files" : len(self.jobs),
+                "uploaded" : sum(1 for job in self.jobs
+                                 if job["video_id"] and not job["duplicate"]),
+                "duplicates" : sum(1 for job in self.jobs if job["duplicate"]),
+                "failed" : sum(1 for job in self.jobs if job["error"]),
+                "bytes" : self.bytes_uploaded,
+                "elapsed" : elapsed,
+                "throughput" : self.bytes_uploaded / elapsed if elapsed else 0}
+
+    def _worker_client(self):
+        client = self.vimeo_client
+        token = client.token
+        return VimeoClient(key=client.key, secret=client.secret,
+                           format="json", cache_timeout=0,
+                           transport=client.transport,
+                           token=token and token.key,
+                           token_secret=token and token.secret)
+
+    def _work(self):
+        client = self._worker_client()
+        while True:
+            try:
+                _, _, job = self._queue.get_nowait()
+            except Queue.Empty:
+                return
+            start = time.time()
+            try:
+                self._upload(client, job)
+            except Exception as error:
+                job["error"] = error
+            job["elapsed"] = time.time() - start
+            self.job_complete_hook(job)
+
+    def _upload(self, client, job):
+        if self.upload_index is not None:
+            video_id = self.upload_index.lookup(job["file"])
+            if video_id is not None:
+                job["video_id"], job["duplicate"] = video_id, True
+                return
+
+        self._reserve(job["size"])
+        try:
+            ticket = client.vimeo_videos_upload_getTicket(format="json")
+            # free space is accounted for here rather than by the uploader
+            uploader = VimeoUploader(client, ticket,
+                                     quota=dict(self.quota, upload_space={}),
+                                     upload_index=self.upload_index)
+            uploader.upload(job["file"], **self.upload_kwargs)
+            job["video_id"] = uploader.complete().get("video_id")
+        except:
+            self._release(job["size"])
+            raise
+        self._release(job["size"], uploaded=True)
+
+    def _reserve(self, size):
+        with self._lock:
+            if self.free_space is not None and \
+               size > self.free_space - self._reserved:
+                raise VimeoError("Not enough free space to upload the file.")
+            self._reserved += size
+
+    def _release(self, size, uploaded=False):
+        with self._lock:
+            self._reserved -= size
+            if uploaded:
+                self.bytes_uploaded += size
+                if self.free_space is not None:
+                    self.free_space -= size
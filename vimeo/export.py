@@ -0,0 +1,338 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Exports an account's library (its user info, videos, albums and channels) to
+JSON lines or CSV files, one per section.
+
+Records are written out as each page of results comes in, so memory use
+doesn't grow with the size of the library, and the details for the items on
+a page are fetched in parallel, within an overall request rate. Progress is
+checkpointed after each page, so an interrupted export picks up where it
+left off when rerun with the same output directory (and the same user,
+format and page size).
+
+Installed as the vimeo-export script:
+
+    $ vimeo-export --key KEY --secret SECRET --token TOKEN \\
+          --token-secret TOKEN_SECRET --format csv USER_ID OUTPUT_DIR
+"""
+
+from optparse import OptionParser
+from os import makedirs, rename
+from os.path import exists, join
+import csv
+import Queue
+import sys
+import threading
+
+try:
+    # python 2.6
+    import json
+except ImportError:
+    import simplejson as json
+
+from . import VimeoClient, VimeoError, VIMEO_KEY, VIMEO_SECRET
+from convenience import RateLimiter
+
+SECTIONS = ("user", "videos", "albums", "channels")
+
+# columns written for each section when exporting to CSV (nested fields are
+# dotted, lists are joined with spaces)
+CSV_FIELDS = {"user" : ("id", "username", "display_name", "realname",
+                        "location", "url", "created_on", "is_plus",
+                        "is_staff", "number_of_videos",
+                        "number_of_uploads", "number_of_likes",
+                        "number_of_contacts", "number_of_albums",
+                        "number_of_channels", "number_of_groups"),
+              "videos" : ("id", "title", "description", "upload_date",
+                          "modified_date", "privacy", "embed_privacy",
+                          "license", "is_hd", "duration", "width", "height",
+                          "number_of_plays", "number_of_likes",
+                          "number_of_comments", "owner.id"),
+              "albums" : ("id", "title", "description", "created_on",
+                          "last_modified", "total_videos", "url",
+                          "video_ids"),
+              "channels" : ("id", "name", "description", "created_on",
+                            "modified_on", "total_videos",
+                            "total_subscribers", "url", "privacy")}
+
+CHECKPOINT_FILE = "checkpoint.json"
+
+# options a checkpoint is only valid for (resuming with a different page
+# size, say, would skip or repeat records)
+CHECKPOINT_OPTIONS = ("user_id", "format", "per_page")
+
+def _as_list(items):
+    if items is None:
+        return []
+    if isinstance(items, dict):
+        return [items]
+    return items
+
+def _field(record, name):
+    value = record
+    for part in name.split("."):
+        if not isinstance(value, dict):
+            return ""
+        value = value.get(part, "")
+    if isinstance(value, list):
+        value = " ".join(unicode(item) for item in value)
+    return unicode(value).encode("utf-8")
+
+
+class JSONLinesWriter(object):
+    extension = "jsonl"
+
+    def __init__(self, output, section, new):
+        self.output = output
+
+    def write(self, record):
+        self.output.write(json.dumps(record) + "\n")
+
+
+class CSVWriter(object):
+    extension = "csv"
+
+    def __init__(self, output, section, new):
+        self.fields = CSV_FIELDS[section]
+        self.writer = csv.writer(output)
+        if new:
+            self.writer.writerow(self.fields)
+
+    def write(self, record):
+        self.writer.writerow([_field(record, name) for name in self.fields])
+
+WRITERS = {"jsonl" : JSONLinesWriter,
+           "csv" : CSVWriter}
+
+
+class Exporter(object):
+    """
+    Exports a user's library to output_dir.
+
+    make_client should return a new client (which will be used with the JSON
+    format). Each of the workers gets its own, and all requests together are
+    limited to rate requests per second if given.
+
+    Raises VimeoError if output_dir holds the checkpoint of an export with a
+    different user_id, format or per_page.
+    """
+    def __init__(self, make_client, user_id, output_dir, format="jsonl",
+                 sections=SECTIONS, workers=4, rate=None, per_page=50,
+                 log=lambda message : None):
+        self.user_id = user_id
+        self.output_dir = output_dir
+        self.format = format
+        self.writer_class = WRITERS[format]
+        self.sections = sections
+        self.per_page = per_page
+        self.log = log
+
+        self.rate_limiter = RateLimiter(rate) if rate else None
+        self.client = make_client()
+        self._clients = Queue.Queue()
+        for _ in range(workers):
+            self._clients.put(make_client())
+        self.workers = workers
+
+        self.checkpoint_path = join(output_dir, CHECKPOINT_FILE)
+        self.checkpoint = {"done" : [], "section" : None, "page" : 0,
+                           "offset" : 0}
+        for name in CHECKPOINT_OPTIONS:
+            self.checkpoint[name] = getattr(self, name)
+        if exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as checkpoint_file:
+                checkpoint = json.load(checkpoint_file)
+            for name in CHECKPOINT_OPTIONS:
+                if checkpoint.get(name) != self.checkpoint[name]:
+                    raise VimeoError(
+                        "{0} is from an export with {1} {2}, not {3}. Rerun "
+                        "with the same options, or use a new output "
+                        "directory.".format(self.checkpoint_path, name,
+                                            checkpoint.get(name),
+                                            self.checkpoint[name]))
+            self.checkpoint = checkpoint
+
+    def run(self):
+        for section in self.sections:
+            if section in self.checkpoint["done"]:
+                self.log("Skipping {0}, already exported.".format(section))
+                continue
+            getattr(self, "_export_" + section)()
+            self.checkpoint["done"].append(section)
+            self._save_checkpoint(None, 0, 0)
+
+    def _call(self, client, method, **params):
+        if self.rate_limiter is not None:
+            self.rate_limiter.consume()
+        return getattr(client, method)(format="json", **params)
+
+    def _map(self, func, items):
+        """
+        Calls func(client, item) for each item using the worker clients, and
+        returns the results in order.
+        """
+        results = [None] * len(items)
+        errors = []
+        indexes = Queue.Queue()
+        for index in range(len(items)):
+            indexes.put(index)
+
+        def _work():
+            client = self._clients.get()
+            try:
+                while not errors:
+                    try:
+                        index = indexes.get_nowait()
+                    except Queue.Empty:
+                        return
+                    results[index] = func(client, items[index])
+            except Exception as error:
+                errors.append(error)
+            finally:
+                self._clients.put(client)
+
+        threads = [threading.Thread(target=_work)
+                   for _ in range(min(self.workers, len(items)))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+        return results
+
+    def _open(self, section):
+        path = join(self.output_dir,
+                    "{0}.{1}".format(section, self.writer_class.extension))
+        if self.checkpoint["section"] == section:
+            # resuming, so drop anything written after the last checkpoint
+            output = open(path, "r+b")
+            output.truncate(self.checkpoint["offset"])
+            output.seek(self.checkpoint["offset"])
+            return output, self.checkpoint["page"], False
+        return open(path, "wb"), 0, True
+
+    def _save_checkpoint(self, section, page, offset):
+        self.checkpoint.update(section=section, page=page, offset=offset)
+        temp_path = self.checkpoint_path + ".tmp"
+        with open(temp_path, "w") as checkpoint_file:
+            json.dump(self.checkpoint, checkpoint_file)
+        rename(temp_path, self.checkpoint_path)
+
+    def _export_pages(self, section, method, key, details=None, **params):
+        output, page, new = self._open(section)
+        writer = self.writer_class(output, section, new)
+        try:
+            while True:
+                page += 1
+                result = self._call(self.client, method, user_id=self.user_id,
+                                    page=page, per_page=self.per_page,
+                                    **params)
+                items = _as_list(result.get(key))
+                if details is not None:
+                    items = self._map(details, items)
+                for item in items:
+                    writer.write(item)
+
+                output.flush()
+                self._save_checkpoint(section, page, output.tell())
+                self.log("Exported page {0} of {1}.".format(page, section))
+
+                if not items or page * self.per_page >= \
+                   int(result.get("total", 0)):
+                    break
+        finally:
+            output.close()
+
+    def _export_user(self):
+        output, _, new = self._open("user")
+        try:
+            person = self._call(self.client, "vimeo_people_getInfo",
+                                user_id=self.user_id)
+            self.writer_class(output, "user", new).write(person)
+        finally:
+            output.close()
+        self.log("Exported user.")
+
+    def _export_videos(self):
+        def _details(client, video):
+            info = self._call(client, "vimeo_videos_getInfo",
+                              video_id=video["id"])
+            return info[0] if isinstance(info, list) else info
+        self._export_pages("videos", "vimeo_videos_getAll", "video",
+                           details=_details, summary_response=1)
+
+    def _export_albums(self):
+        def _details(client, album):
+            album["video_ids"], page = [], 0
+            while True:
+                page += 1
+                result = self._call(client, "vimeo_albums_getVideos",
+                                    album_id=album["id"], page=page,
+                                    per_page=self.per_page)
+                videos = _as_list(result.get("video"))
+                album["video_ids"].extend(video["id"] for video in videos)
+                if not videos or page * self.per_page >= \
+                   int(result.get("total", 0)):
+                    return album
+        self._export_pages("albums", "vimeo_albums_getAll", "album",
+                           details=_details)
+
+    def _export_channels(self):
+        self._export_pages("channels", "vimeo_channels_getAll", "channel")
+
+
+def main(argv=None):
+    parser = OptionParser(usage="%prog [options] USER_ID OUTPUT_DIR",
+                          description="Exports a Vimeo user's library.")
+    parser.add_option("--key", default=VIMEO_KEY, help="API key")
+    parser.add_option("--secret", default=VIMEO_SECRET, help="API secret")
+    parser.add_option("--token", help="OAuth access token")
+    parser.add_option("--token-secret", help="OAuth access token secret")
+    parser.add_option("--format", choices=sorted(WRITERS), default="jsonl",
+                      help="output format (jsonl or csv, default: jsonl)")
+    parser.add_option("--sections", default=",".join(SECTIONS),
+                      help="sections to export (default: %default)")
+    parser.add_option("--workers", type="int", default=4,
+                      help="parallel requests (default: %default)")
+    parser.add_option("--rate", type="float", default=None,
+                      help="maximum requests per second (default: no limit)")
+    parser.add_option("--per-page", type="int", default=50,
+                      help="results per page (default: %default)")
+    parser.add_option("--quiet", action="store_true", default=False,
+                      help="don't print progress")
+    options, args = parser.parse_args(argv)
+    if len(args) != 2:
+        parser.error("expected a user id and an output directory")
+    user_id, output_dir = args
+
+    sections = tuple(section.strip() for section in options.sections.split(","))
+    unknown = set(sections) - set(SECTIONS)
+    if unknown:
+        parser.error("unknown sections: {0}".format(", ".join(sorted(unknown))))
+
+    if not exists(output_dir):
+        makedirs(output_dir)
+
+    def make_client():
+        return VimeoClient(key=options.key, secret=options.secret,
+                           format="json", token=options.token,
+                           token_secret=options.token_secret,
+                           cache_timeout=0)
+
+    def log(message):
+        if not options.quiet:
+            print >> sys.stderr, message
+
+    try:
+        exporter = Exporter(make_client, user_id, output_dir,
+                            format=options.format, sections=sections,
+                            workers=options.workers, rate=options.rate,
+                            per_page=options.per_page, log=log)
+    except VimeoError as error:
+        parser.error(str(error))
+    exporter.run()
+
+if __name__ == "__main__":
+    main()
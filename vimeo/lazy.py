@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Lean video listings, which are fetched as summaries and upgraded to full
+detail only if a field that's missing from the summary is asked for.
+
+Enabled by passing lean=True to the client (or to an individual call of one
+of the LEAN_METHODS), when using the JSON format without compact records
+(for anything else, lean is ignored):
+
+    v = VimeoClient(format="json", lean=True)
+    videos = v.vimeo_videos_getAll(user_id="brad")["video"]
+    videos[0]["title"]            # from the summary
+    videos[0]["number_of_plays"]  # upgrades the whole page
+
+The first time any video on a page is missing a field, the page is requested
+again with full_response, which upgrades every video on it with a single
+request. Videos that aren't on the full page any more (e.g. because the
+listing changed in between) are upgraded with videos.getInfo. Each page is
+only ever upgraded once.
+
+Note that only item access (video[key] and video.get(key)) upgrades a video;
+"in" checks and iterating only look at the fields already there. Errors from
+the upgrade requests are raised by both (get doesn't return its default for
+them), and a failed upgrade is tried again on the next access.
+"""
+
+import threading
+
+# video listings that accept the summary_response and full_response flags
+LEAN_METHODS = ("vimeo_albums_getVideos",
+                "vimeo_channels_getVideos",
+                "vimeo_groups_getVideos",
+                "vimeo_videos_getAll",
+                "vimeo_videos_getAppearsIn",
+                "vimeo_videos_getByTag",
+                "vimeo_videos_getContactsLiked",
+                "vimeo_videos_getContactsUploaded",
+                "vimeo_videos_getLikes",
+                "vimeo_videos_getSubscriptions",
+                "vimeo_videos_getUploaded",
+                "vimeo_videos_search")
+
+
+class LazyVideo(dict):
+    """
+    A video from a lean listing, holding its summary fields until one that's
+    missing is accessed.
+
+    get only returns default for fields that are missing after the upgrade,
+    errors while upgrading are raised.
+    """
+    def __init__(self, page, summary):
+        dict.__init__(self, summary)
+        self.page = page
+        self.upgraded = False
+
+    def __missing__(self, key):
+        if self.page.upgrade(self):
+            return self[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+class LazyPage(object):
+    """
+    Upgrades the videos of one page of a lean listing.
+    """
+    def __init__(self, client, name, params, summaries):
+        self.client = client
+        self.name = name
+        self.params = params
+        self.videos = [LazyVideo(self, summary) for summary in summaries]
+        self.fetched = False
+        self._lock = threading.RLock()
+
+    def _full_params(self):
+        params = dict(self.params, full_response=1, lean=False)
+        params.pop("summary_response", None)
+        return params
+
+    def upgrade(self, video):
+        """
+        Upgrades the page's videos to full detail if that hasn't already been
+        done, and returns whether the given video was upgraded.
+        """
+        with self._lock:
+            if video.upgraded:
+                return False
+
+            if not self.fetched:
+                # only marked as fetched once it worked, so that a failed
+                # request is retried for the whole page
+                full = getattr(self.client, self.name)(**self._full_params())
+                self.fetched = True
+                full_videos = full.get("video", []) if full else []
+                if isinstance(full_videos, dict):
+                    full_videos = [full_videos]
+                by_id = dict((full_video.get("id"), full_video)
+                             for full_video in full_videos)
+                for lazy_video in self.videos:
+                    full_video = by_id.get(dict.get(lazy_video, "id"))
+                    if full_video is not None:
+                        dict.update(lazy_video, full_video)
+                        lazy_video.upgraded = True
+
+            if not video.upgraded:
+                info = self.client.vimeo_videos_getInfo(
+                                            video_id=dict.get(video, "id"),
+                                            format="json")
+                dict.update(video, info[0] if isinstance(info, list) else info)
+                video.upgraded = True
+            return True
+
+
+def make_lazy(client, name, params, content):
+    """
+    Replaces the videos in a processed JSON listing with LazyVideos. Anything
+    else (e.g. XML, or compact records) is returned unchanged.
+    """
+    if not isinstance(content, dict) or "video" not in content:
+        return content
+
+    summaries = content["video"]
+    single = isinstance(summaries, dict)
+    if single:
+        summaries = [summaries]
+    page = LazyPage(client, name, params, summaries)
+    content["video"] = page.videos[0] if single else page.videos
+    return content
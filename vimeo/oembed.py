@@ -7,6 +7,7 @@ from urllib import urlencode
 from httplib2 import Http
 
 from . import XMLProcessor, JSONProcessor, FormatProcessor, DEFAULT_HEADERS
+from transport import Transport
 
 
 OEMBED_BASE_URL = "http://vimeo.com/api/oembed"
@@ -26,12 +27,18 @@ class VimeoOEmbedClient(object):
             choices are XML and JSON, but check the API documentation for other
             potential options. Can be overridden on an individual API call
             basis.
+
+        transport (default: a plain Transport):
+            Performs the requests. See vimeo.transport for transports that
+            record or replay them.
     """
-    _processors = {"xml" : XMLProcessor(),
-                   "json" : JSONProcessor()}
+    # processors keep state while processing, so a new one is made per call
+    _processors = {"xml" : XMLProcessor,
+                   "json" : JSONProcessor}
 
-    def __init__(self, format="xml"):
+    def __init__(self, format="xml", transport=None):
         self.default_response_format = format
+        self.transport = transport if transport is not None else Transport()
 
     def _get_default_response_format(self):
         return self._default_response_format.lower()
@@ -43,7 +50,10 @@ class VimeoOEmbedClient(object):
 
     def get_oembed(self, **params):
         format = params.pop("format", self.default_response_format).lower()
-        processor = self._processors.get(format, FormatProcessor())
-        uri = "{0}.{1}?{2}".format(OEMBED_BASE_URL, format, urlencode(params))
+        processor = self._processors.get(format, FormatProcessor)()
+        url = "{0}.{1}".format(OEMBED_BASE_URL, format)
+        uri = "{0}?{1}".format(url, urlencode(params))
 
-        return processor(*Http().request(uri))
+        send = lambda : Http().request(uri)
+        return processor(*self.transport.request("oembed", "GET", url, params,
+                                                 send))
@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+A pool of clients for acting on behalf of many accounts at once.
+
+Rather than a full VimeoClient per OAuth token, a VimeoClientPool hands out
+lightweight per-token views, which share a pool of HTTP connections and a
+cache for responses that don't depend on the token:
+
+    pool = VimeoClientPool(key, secret, format="json", rate_limit=1)
+    v = pool.get_client(token, token_secret)
+    v.vimeo_videos_getInfo(video_id="5775787")
+"""
+
+import Queue
+import threading
+import time
+
+import httplib2
+import oauth2
+
+from . import VimeoClient, VimeoAPIError, VIMEO_KEY, VIMEO_SECRET
+from convenience import RateLimiter
+
+# methods whose responses are the same for every token, as long as the named
+# parameter identifies what's being asked for (otherwise they default to the
+# token's own user)
+SHARED_METHODS = {"vimeo_videos_getInfo" : "video_id",
+                  "vimeo_videos_getThumbnailUrls" : "video_id",
+                  "vimeo_videos_getCast" : "video_id",
+                  "vimeo_channels_getInfo" : "channel_id",
+                  "vimeo_groups_getInfo" : "group_id",
+                  "vimeo_people_getInfo" : "user_id",
+                  "vimeo_people_getPortraitUrls" : "user_id"}
+
+class ConnectionPool(object):
+    """
+    A bounded set of Http objects (each holding its own connections), which
+    are checked out for one request at a time.
+
+    Up to size requests can be in flight at once; further requests wait for
+    one of them to finish.
+    """
+    def __init__(self, size=8, http_factory=httplib2.Http):
+        self.size = size
+        self.http_factory = http_factory
+        self._idle = Queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _checkout(self):
+        try:
+            return self._idle.get_nowait()
+        except Queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                return self.http_factory()
+        return self._idle.get()
+
+    def request(self, *args, **kwargs):
+        http = self._checkout()
+        try:
+            return http.request(*args, **kwargs)
+        finally:
+            self._idle.put(http)
+
+
+class _SharedHttpClient(object):
+    """
+    Signs requests with a single token, but sends them over the pool's shared
+    connections. Stands in for the oauth2.Client of a regular VimeoClient.
+    """
+    def __init__(self, pool, consumer, token, signature_method,
+                 rate_limiter=None):
+        self.pool = pool
+        self.consumer = consumer
+        self.token = token
+        self.signature_method = signature_method
+        self.rate_limiter = rate_limiter
+
+    def request(self, uri, method="GET", body=None, headers=None):
+        if self.rate_limiter is not None:
+            self.rate_limiter.consume()
+
+        request = oauth2.Request.from_consumer_and_token(
+                                                    consumer=self.consumer,
+                                                    token=self.token,
+                                                    http_method=method,
+                                                    http_url=uri)
+        request.sign_request(self.signature_method, self.consumer, self.token)
+        return self.pool.connections.request(request.to_url(), method,
+                                             body=body, headers=headers)
+
+
+class VimeoClientView(VimeoClient):
+    """
+    A client for a single token, handed out by a VimeoClientPool.
+
+    Behaves like a VimeoClient, except that its requests go over the pool's
+    connections and count against its own rate limit, and that calls to the
+    pool's shared methods are first tried without the token, through the
+    pool's public client (and so its cache). Calls that fail that way (e.g.
+    for private videos) are then made with the token, and cached by the view.
+    """
+    def __init__(self, pool, token=None, token_secret=None,
+                 rate_limiter=None):
+        # needed by _new_client, which the base initializer calls
+        self.pool = pool
+        self.rate_limiter = rate_limiter
+        self.last_used = time.time()
+
+        VimeoClient.__init__(self, key=pool.key, secret=pool.secret,
+                             format=pool.format, token=token,
+                             token_secret=token_secret,
+                             cache_timeout=pool.cache_timeout,
+                             compact=pool.compact, transport=pool.transport)
+
+    def _new_client(self):
+        return _SharedHttpClient(self.pool, self.consumer, self.token,
+                                 self.signature_method, self.rate_limiter)
+
+    def __getattr__(self, name):
+        call = VimeoClient.__getattr__(self, name)
+        self.last_used = time.time()
+
+        shared_param = self.pool.shared_methods.get(name)
+        if shared_param is None or self.token is None:
+            return call
+
+        def _shared_call(**params):
+            if shared_param not in params:
+                return call(**params)
+
+            key = (name, frozenset(params.items()))
+            if self.pool._is_private(key):
+                return call(**params)
+            try:
+                return getattr(self.pool.public_client, name)(**params)
+            except VimeoAPIError:
+                self.pool._mark_private(key)
+                return call(**params)
+        return _shared_call
+
+
+class VimeoClientPool(object):
+    """
+    Hands out VimeoClientViews for OAuth tokens, and cleans up the views that
+    haven't been used for a while.
+
+    All views share one ConnectionPool, allowing up to connections requests
+    at once (http_factory makes its Http objects), and one cache, held by
+    public_client, for calls to the methods in shared_methods (see
+    SHARED_METHODS). Other calls are cached per view, as usual.
+
+    rate_limit (in requests per second, with bursts of up to rate_burst
+    requests) limits the requests made with each token. Views idle for longer
+    than idle_timeout seconds are dropped by cleanup, and once there are more
+    than max_views views, the least recently used one is dropped as new ones
+    are handed out.
+    """
+    def __init__(self, key=VIMEO_KEY, secret=VIMEO_SECRET, format="xml",
+                 cache_timeout=120, compact=False, transport=None,
+                 shared_methods=SHARED_METHODS, rate_limit=None,
+                 rate_burst=None, max_views=1000, idle_timeout=600,
+                 connections=8, http_factory=httplib2.Http):
+        self.key = key
+        self.secret = secret
+        self.format = format
+        self.cache_timeout = cache_timeout
+        self.compact = compact
+        self.transport = transport
+        self.shared_methods = shared_methods
+        self.rate_limit = rate_limit
+        self.rate_burst = rate_burst
+        self.max_views = max_views
+        self.idle_timeout = idle_timeout
+
+        self.connections = ConnectionPool(connections, http_factory)
+        self._lock = threading.Lock()
+        self._views = {}
+        self._private = {}
+
+        self.public_client = VimeoClientView(self)
+
+    def __len__(self):
+        return len(self._views)
+
+    def get_client(self, token, token_secret):
+        """
+        Returns the view for the given token, creating it if needed.
+        """
+        with self._lock:
+            view = self._views.get(token)
+            if view is None or view.token.secret != token_secret:
+                rate_limiter = None
+                if self.rate_limit:
+                    rate_limiter = RateLimiter(self.rate_limit,
+                                               self.rate_burst)
+                view = VimeoClientView(self, token, token_secret,
+                                       rate_limiter)
+                self._views[token] = view
+                if len(self._views) > self.max_views:
+                    self._evict()
+            view.last_used = time.time()
+            return view
+
+    def cleanup(self):
+        """
+        Drops the views that have been idle for longer than idle_timeout, and
+        forgets expired private calls.
+        """
+        now = time.time()
+        with self._lock:
+            for token, view in self._views.items():
+                if now - view.last_used > self.idle_timeout:
+                    del self._views[token]
+            for key, marked in self._private.items():
+                if now - marked > self.cache_timeout:
+                    del self._private[key]
+
+    def flush_cache(self):
+        """
+        Manually clear the shared response cache.
+        """
+        self.public_client.flush_cache()
+        self._private = {}
+
+    def _evict(self):
+        token = min(self._views, key=lambda token : self._views[token].last_used)
+        del self._views[token]
+
+    def _is_private(self, key):
+        marked = self._private.get(key)
+        return marked is not None and \
+               time.time() - marked <= self.cache_timeout
+
+    def _mark_private(self, key):
+        self._private[key] = time.time()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Compact records for the most common API entities (videos, users, albums,
+channels and thumbnails).
+
+Processed responses are normally nested dicts (JSON) or ElementTree nodes
+(XML), both of which carry a lot of per-object overhead that adds up once a
+client has cached a large number of them. The records in this module use
+__slots__ instead of a per-instance dict, and share a single copy of the
+field values that can only take a handful of values (privacy settings,
+flags, thumbnail sizes and so on).
+
+Each record class lists the fields it has slots for. Any other fields in a
+response (e.g. a video's urls, tags or cast, or a user's portraits) are
+kept as they came in, in a tuple of (name, value) pairs in the record's
+extra slot, and can still be read as attributes; they just don't get the
+savings.
+
+To use them, instantiate the client with compact=True:
+
+    v = VimeoClient(format="json", compact=True)
+    video = v.vimeo_videos_getInfo(video_id="5775787")[0]
+    video.title, video.owner.username
+
+Responses that don't correspond to one of the known entities (or a page of
+them) are returned unchanged.
+"""
+
+from . import JSONProcessor, XMLProcessor
+
+_strings = {}
+
+def intern_string(value):
+    """
+    Returns a shared copy of the given string.
+
+    Unlike the intern builtin, this works for unicode strings as well, which
+    is what the JSON processor produces. Shared copies are never released, so
+    this should only be used for fields with a small, fixed set of values.
+    """
+    if value is None:
+        return None
+    return _strings.setdefault(value, value)
+
+
+class Record(object):
+    """
+    Base class for compact records.
+
+    Subclasses list their fields in __slots__. Fields listed in _interned are
+    shared between records via intern_string, fields listed in _nested hold
+    other records (or a tuple of them, if a child tag is given), and the
+    field named by _text holds the node's text content.
+
+    Fields without a slot are kept in extra as (name, value) pairs (or None
+    if there aren't any), with the values as the processor returned them
+    (dicts and lists for JSON, text or ElementTree nodes for XML).
+    """
+    __slots__ = ("extra",)
+    _interned = ()
+    _nested = {}
+    _text = None
+
+    def __init__(self, extra=None, **fields):
+        for name in self.__slots__:
+            value = fields.get(name)
+            if name in self._interned:
+                value = intern_string(value)
+            setattr(self, name, value)
+        self.extra = tuple((intern_string(name), value)
+                           for name, value in extra or ()) or None
+
+    def __getattr__(self, name):
+        # only called for names without a slot
+        if name != "extra":
+            for extra_name, value in self.extra or ():
+                if extra_name == name:
+                    return value
+        raise AttributeError(name)
+
+    @classmethod
+    def from_json(cls, data):
+        """
+        Builds a record from a dict produced by the JSON processor.
+        """
+        fields = {}
+        for name in cls.__slots__:
+            if name in cls._nested:
+                record, child = cls._nested[name]
+                value = data.get(name)
+                if value is None:
+                    continue
+                if child is None:
+                    fields[name] = record.from_json(value)
+                else:
+                    fields[name] = tuple(record.from_json(item)
+                                         for item in _as_list(value, child))
+            elif name == cls._text:
+                fields[name] = data.get("_content")
+            else:
+                fields[name] = data.get(name)
+
+        known = set(cls.__slots__)
+        if cls._text is not None:
+            known.add("_content")
+        extra = [(name, value) for name, value in data.items()
+                 if name not in known]
+        return cls(extra=extra, **fields)
+
+    @classmethod
+    def from_element(cls, element):
+        """
+        Builds a record from an ElementTree node produced by the XML processor.
+        """
+        fields = {}
+        for name in cls.__slots__:
+            if name in cls._nested:
+                record, child = cls._nested[name]
+                node = element.find(name)
+                if node is None:
+                    continue
+                if child is None:
+                    fields[name] = record.from_element(node)
+                else:
+                    fields[name] = tuple(record.from_element(item)
+                                         for item in node.findall(child))
+            elif name == cls._text:
+                fields[name] = element.text
+            else:
+                value = element.get(name)
+                if value is None:
+                    node = element.find(name)
+                    if node is not None:
+                        value = node.text
+                fields[name] = value
+
+        extra = [(name, value) for name, value in element.items()
+                 if name not in cls.__slots__]
+        for node in element:
+            if node.tag not in cls.__slots__:
+                # plain child nodes are read like the known fields, anything
+                # with attributes or children of its own is kept whole
+                if len(node) or node.attrib:
+                    extra.append((node.tag, node))
+                else:
+                    extra.append((node.tag, node.text))
+        return cls(extra=extra, **fields)
+
+    def _asdict(self):
+        fields = dict(self.extra or ())
+        fields.update((name, getattr(self, name)) for name in self.__slots__)
+        return fields
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__) + \
+               (self.extra,)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+        self.extra = state[len(self.__slots__)]
+
+    def __eq__(self, other):
+        if type(self) is not type(other):
+            return NotImplemented
+        return self.__getstate__() == other.__getstate__()
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return equal
+        return not equal
+
+    def __repr__(self):
+        return "<{0} {1}>".format(self.__class__.__name__,
+                                  getattr(self, "id", None))
+
+
+class Thumbnail(Record):
+    __slots__ = ("width", "height", "url")
+    _interned = ("width", "height")
+    _text = "url"
+
+    def __repr__(self):
+        return "<Thumbnail {0}x{1}>".format(self.width, self.height)
+
+
+class User(Record):
+    __slots__ = ("id", "username", "display_name", "realname", "is_plus",
+                 "is_staff", "profileurl", "videosurl", "location", "bio",
+                 "created_on", "number_of_videos", "number_of_contacts",
+                 "number_of_albums", "number_of_channels")
+    _interned = ("is_plus", "is_staff")
+
+
+class Video(Record):
+    __slots__ = ("id", "title", "description", "upload_date",
+                 "modified_date", "privacy", "embed_privacy", "license",
+                 "is_hd", "is_transcoding", "is_watchlater", "width",
+                 "height", "duration", "number_of_likes", "number_of_plays",
+                 "number_of_comments", "owner", "thumbnails")
+    _interned = ("privacy", "embed_privacy", "license", "is_hd",
+                 "is_transcoding", "is_watchlater", "width", "height")
+    _nested = {"owner" : (User, None),
+               "thumbnails" : (Thumbnail, "thumbnail")}
+
+
+class Album(Record):
+    __slots__ = ("id", "title", "description", "created_on",
+                 "last_modified", "total_videos", "url", "video_sort_method",
+                 "thumbnail_video", "owner")
+    _interned = ("video_sort_method",)
+    _nested = {"owner" : (User, None)}
+
+
+class Channel(Record):
+    __slots__ = ("id", "name", "description", "created_on", "modified_on",
+                 "total_videos", "total_subscribers", "url", "logo_url",
+                 "badge_url", "is_featured", "is_sponsored", "privacy",
+                 "layout", "theme", "creator")
+    _interned = ("is_featured", "is_sponsored", "privacy", "layout", "theme")
+    _nested = {"creator" : (User, None)}
+
+
+class Page(Record):
+    """
+    A page of records, as returned by the API's listing methods.
+    """
+    __slots__ = ("page", "perpage", "on_this_page", "total", "items")
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def __repr__(self):
+        return "<Page {0} ({1} items)>".format(self.page, len(self.items))
+
+
+# maps the name of an entity's node in a response to its record class (not
+# "user", which is also the root of the upload quota response)
+ENTITIES = {"video" : Video,
+            "person" : User,
+            "album" : Album,
+            "channel" : Channel,
+            "thumbnail" : Thumbnail}
+
+def _as_list(value, child):
+    items = value.get(child, []) if isinstance(value, dict) else value
+    if isinstance(items, dict):
+        items = [items]
+    return items
+
+def _listed_entity(root):
+    """
+    Returns the entity name and record class for a listing like "videos", or
+    (None, None) if the root isn't a listing of a known entity.
+    """
+    if root.endswith("s") and root[:-1] in ENTITIES:
+        return root[:-1], ENTITIES[root[:-1]]
+    return None, None
+
+def from_json(root, content):
+    """
+    Converts processed JSON content into records, if the root is a known
+    entity or a listing of one.
+    """
+    if root in ENTITIES:
+        record = ENTITIES[root]
+        if isinstance(content, list):
+            return tuple(record.from_json(item) for item in content)
+        return record.from_json(content)
+
+    child, record = _listed_entity(root)
+    if record is not None and isinstance(content, dict):
+        items = tuple(record.from_json(item)
+                      for item in _as_list(content, child))
+        return Page(page=content.get("page"),
+                    perpage=content.get("perpage"),
+                    on_this_page=content.get("on_this_page"),
+                    total=content.get("total"),
+                    items=items)
+    return content
+
+def from_element(element):
+    """
+    Converts a processed XML node into records, if its tag is a known entity
+    or a listing of one.
+    """
+    if element.tag in ENTITIES:
+        return ENTITIES[element.tag].from_element(element)
+
+    child, record = _listed_entity(element.tag)
+    if record is not None:
+        items = tuple(record.from_element(item)
+                      for item in element.findall(child))
+        return Page(page=element.get("page"),
+                    perpage=element.get("perpage"),
+                    on_this_page=element.get("on_this_page"),
+                    total=element.get("total"),
+                    items=items)
+    return element
+
+
+class CompactJSONProcessor(JSONProcessor):
+    """
+    JSON API processor that returns compact records.
+    """
+    def process_content(self, root, content):
+        return from_json(root, content)
+
+class CompactXMLProcessor(XMLProcessor):
+    """
+    XML API processor that returns compact records.
+    """
+    def process_content(self, root, content):
+        return from_element(content)
+
+COMPACT_PROCESSORS = {"JSON" : CompactJSONProcessor,
+                      "XML" : CompactXMLProcessor}
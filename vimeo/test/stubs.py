@@ -0,0 +1,45 @@
+"""
+Helpers for testing without making any requests.
+"""
+import threading
+
+try:
+    # python 2.6
+    import json
+except ImportError:
+    import simplejson as json
+
+from vimeo.transport import Transport
+
+
+def json_response(root, content):
+    """
+    Returns the body of a successful JSON API response.
+    """
+    return json.dumps({"stat" : "ok", "generated_in" : "0.01", root : content})
+
+def json_error(code, msg):
+    return json.dumps({"stat" : "fail", "err" : {"code" : code, "msg" : msg}})
+
+
+class StubTransport(Transport):
+    """
+    Answers each request with responder(source, method, url, params,
+    body_size), which should return the response content, and keeps a list
+    of the requests. Nothing is ever sent.
+    """
+    def __init__(self, responder):
+        self.responder = responder
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def request(self, source, method, url, params, send, headers=None,
+                body_size=None):
+        params = dict(params)
+        with self._lock:
+            self.requests.append((source, method, url, params))
+        content = self.responder(source, method, url, params, body_size)
+        return {"status" : "200"}, content
+
+    def methods(self):
+        return [params.get("method") for _, _, _, params in self.requests]
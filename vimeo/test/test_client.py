@@ -0,0 +1,54 @@
+import threading
+import unittest
+
+from vimeo import VimeoClient, VimeoAPIError
+from vimeo.test.stubs import StubTransport, json_response, json_error
+
+
+def echo_video(source, method, url, params, body_size):
+    if params["video_id"] == "missing":
+        return json_error("1", "Video not found")
+    return json_response("video", [{"id" : params["video_id"]}])
+
+def make_client(transport, **kwargs):
+    return VimeoClient(key="key", secret="secret", format="json",
+                       transport=transport, **kwargs)
+
+class TestVimeoClient(unittest.TestCase):
+    def test_caches_responses(self):
+        transport = StubTransport(echo_video)
+        client = make_client(transport)
+        first = client.vimeo_videos_getInfo(video_id="1")
+        self.assertTrue(client.videos_getInfo(video_id="1") is first)
+        self.assertEqual(len(transport.requests), 1)
+
+    def test_api_errors(self):
+        client = make_client(StubTransport(echo_video))
+        self.assertRaises(VimeoAPIError, client.vimeo_videos_getInfo,
+                          video_id="missing")
+
+    def test_concurrent_clients_get_their_own_responses(self):
+        transport = StubTransport(echo_video)
+        wrong = []
+        clients = [make_client(transport, cache_timeout=0)
+                   for _ in range(8)]
+
+        def _work(worker):
+            client = clients[worker]
+            for call in range(200):
+                video_id = "{0}-{1}".format(worker, call)
+                try:
+                    got = client.vimeo_videos_getInfo(video_id=video_id)
+                    if got[0]["id"] != video_id:
+                        wrong.append((video_id, got))
+                except Exception as error:
+                    wrong.append((video_id, error))
+
+        threads = [threading.Thread(target=_work, args=(worker,))
+                   for worker in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(wrong, [])
+        self.assertEqual(len(transport.requests), 8 * 200)
@@ -0,0 +1,280 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from vimeo import VimeoClient, VimeoError
+import xml.etree.ElementTree as etree
+
+from vimeo.convenience import (ChunkSizer, RateLimiter, UploadIndex,
+                               UploadManager, VimeoUploader, _verified_chunks)
+from vimeo.test.stubs import StubTransport, json_response
+
+
+class UploadAPI(object):
+    """
+    Answers the upload API methods, handing out a new ticket each time and
+    verifying the chunks that were posted. lose_chunk drops a chunk.
+    """
+    def __init__(self, free=10 ** 9):
+        self.free = free
+        self.tickets = 0
+        self.chunks = {}
+        self.lose_chunk = None
+        self.lock = threading.Lock()
+
+    def __call__(self, source, method, url, params, body_size):
+        if source == "upload":
+            if params["chunk_id"] != self.lose_chunk:
+                with self.lock:
+                    self.chunks.setdefault(params["ticket_id"], {})[
+                                                params["chunk_id"]] = body_size
+            return "OK"
+
+        method = params["method"]
+        if method == "vimeo.videos.upload.getQuota":
+            return json_response("user", {"upload_space" : {
+                                                    "free" : str(self.free)},
+                                          "hd_quota" : "1"})
+        elif method == "vimeo.videos.upload.getTicket":
+            with self.lock:
+                self.tickets += 1
+                ticket = "t{0}".format(self.tickets)
+            return json_response("ticket", {"id" : ticket,
+                                            "endpoint" : "http://upload/",
+                                            "max_file_size" : "1000000"})
+        elif method == "vimeo.videos.upload.verifyChunks":
+            chunks = self.chunks.get(params["ticket_id"], {})
+            return json_response("ticket", {
+                "id" : params["ticket_id"],
+                "chunks" : {"chunk" : [{"id" : str(chunk_id),
+                                        "size" : str(size)}
+                                       for chunk_id, size in chunks.items()]}})
+        elif method == "vimeo.videos.upload.complete":
+            return json_response("ticket", {
+                                    "id" : params["ticket_id"],
+                                    "video_id" : "v" + params["ticket_id"]})
+        raise AssertionError("Unexpected call to {0}".format(method))
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_allows_bursts(self):
+        limiter = RateLimiter(10, burst=5)
+        started = time.time()
+        limiter.consume(5)
+        self.assertTrue(time.time() - started < 0.05)
+
+    def test_limits_rate(self):
+        limiter = RateLimiter(100, burst=10)
+        started = time.time()
+        for _ in range(3):
+            limiter.consume(10)
+        # the first 10 are the burst, the other 20 take 0.2 seconds
+        self.assertTrue(time.time() - started >= 0.19)
+
+    def test_limits_rate_across_threads(self):
+        limiter = RateLimiter(100, burst=1)
+        threads = [threading.Thread(target=limiter.consume, args=(10,))
+                   for _ in range(4)]
+        started = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertTrue(time.time() - started >= 0.38)
+
+
+class UploadTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make_file(self, name, size, content="x"):
+        path = os.path.join(self.directory, name)
+        with open(path, "wb") as video:
+            video.write(content * size)
+        return path
+
+    def make_client(self, api):
+        self.transport = StubTransport(api)
+        return VimeoClient(key="key", secret="secret", format="json",
+                           token="token", token_secret="secret",
+                           transport=self.transport)
+
+
+class TestUploadIndex(UploadTestCase):
+    def test_saved_index_loads_back(self):
+        path = os.path.join(self.directory, "index.json")
+        video = self.make_file("video", 100)
+        other = self.make_file("other", 100, content="y")
+
+        index = UploadIndex(path)
+        index.add(100, index.hash_file(video), "v1")
+        self.assertTrue(os.path.exists(path))
+
+        loaded = UploadIndex(path)
+        self.assertEqual(len(loaded), 1)
+        self.assertEqual(loaded.lookup(video), "v1")
+        self.assertEqual(loaded.lookup(other), None)
+        self.assertEqual(loaded.lookup(self.make_file("small", 10)), None)
+
+
+class TestUploadFile(UploadTestCase):
+    def test_adds_new_uploads_to_the_index(self):
+        index = UploadIndex()
+        video = self.make_file("video", 250)
+        client = self.make_client(UploadAPI())
+        self.assertEqual(client.upload_file(video, upload_index=index,
+                                            chunk=True, chunk_size=100),
+                         "vt1")
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.lookup(video), "vt1")
+
+    def test_returns_indexed_uploads_without_asking_for_a_ticket(self):
+        index = UploadIndex()
+        video = self.make_file("video", 100)
+        index.add(100, index.hash_file(video), "v7")
+
+        client = self.make_client(UploadAPI())
+        self.assertEqual(client.upload_file(self.make_file("copy", 100),
+                                            upload_index=index), "v7")
+        self.assertEqual(self.transport.requests, [])
+
+
+class TestUploadManager(UploadTestCase):
+    def test_reserve_and_release(self):
+        manager = UploadManager(self.make_client(UploadAPI()))
+        manager.free_space = 100
+        manager._reserve(60)
+        self.assertRaises(VimeoError, manager._reserve, 50)
+        manager._release(60)
+        manager._reserve(50)
+        manager._release(50, uploaded=True)
+        self.assertEqual(manager.free_space, 50)
+        self.assertEqual(manager.bytes_uploaded, 50)
+        self.assertEqual(manager._reserved, 0)
+
+    def test_uploads_smallest_first(self):
+        manager = UploadManager(self.make_client(UploadAPI()), concurrency=1)
+        big = manager.add(self.make_file("big", 300))
+        small = manager.add(self.make_file("small", 100))
+        manager.run()
+        self.assertEqual(small["video_id"], "vt1")
+        self.assertEqual(big["video_id"], "vt2")
+        self.assertEqual(manager.stats["uploaded"], 2)
+        self.assertEqual(manager.stats["bytes"], 400)
+
+    def test_uploads_by_priority(self):
+        manager = UploadManager(self.make_client(UploadAPI()), concurrency=1,
+                                order="priority")
+        urgent = manager.add(self.make_file("big", 300), priority=1)
+        manager.add(self.make_file("small", 100))
+        manager.run()
+        self.assertEqual(urgent["video_id"], "vt1")
+
+    def test_quota_is_fetched_once_and_tracked(self):
+        api = UploadAPI(free=250)
+        manager = UploadManager(self.make_client(api), concurrency=1)
+        jobs = [manager.add(self.make_file(name, 100))
+                for name in ("a", "b", "c")]
+        manager.run()
+        self.assertEqual([job["video_id"] for job in jobs],
+                         ["vt1", "vt2", None])
+        self.assertTrue(isinstance(jobs[2]["error"], VimeoError))
+        self.assertEqual(manager.free_space, 50)
+        methods = self.transport.methods()
+        self.assertEqual(methods.count("vimeo.videos.upload.getQuota"), 1)
+        # no ticket is asked for once the file can't fit
+        self.assertEqual(api.tickets, 2)
+
+    def test_skips_duplicates(self):
+        index = UploadIndex()
+        first = self.make_file("first", 100)
+        manager = UploadManager(self.make_client(UploadAPI()),
+                                upload_index=index)
+        manager.add(first)
+        manager.run()
+
+        manager = UploadManager(self.make_client(UploadAPI()),
+                                upload_index=index)
+        duplicate = manager.add(self.make_file("copy", 100))
+        manager.run()
+        self.assertEqual(duplicate["video_id"], "vt1")
+        self.assertTrue(duplicate["duplicate"])
+        self.assertEqual(self.transport.methods(),
+                         ["vimeo.videos.upload.getQuota"])
+
+
+class TestChunkSizer(unittest.TestCase):
+    def test_starts_within_bounds(self):
+        self.assertEqual(ChunkSizer(10, min_size=100, max_size=1000).size, 100)
+        self.assertEqual(ChunkSizer(5000, min_size=100, max_size=1000).size,
+                         1000)
+
+    def test_max_is_never_below_min(self):
+        sizer = ChunkSizer(500, min_size=100, max_size=50)
+        self.assertEqual(sizer.size, 100)
+
+    def test_grows_on_fast_chunks(self):
+        sizer = ChunkSizer(100, min_size=100, max_size=1000, target_time=1)
+        sizes = [sizer.record(sizer.size, 0.01) for _ in range(5)]
+        self.assertEqual(sizes, [200, 400, 800, 1000, 1000])
+
+    def test_shrinks_on_slow_chunks(self):
+        sizer = ChunkSizer(800, min_size=100, max_size=1000, target_time=1)
+        sizes = [sizer.record(sizer.size, 100) for _ in range(5)]
+        self.assertEqual(sizes, [400, 200, 100, 100, 100])
+
+    def test_settles_on_target_time(self):
+        sizer = ChunkSizer(100, min_size=1, max_size=10 ** 6, target_time=2)
+        for _ in range(20):
+            sizer.record(sizer.size, sizer.size / 1000.0)
+        self.assertEqual(sizer.size, 2000)
+
+
+class TestVimeoUploader(UploadTestCase):
+    def make_uploader(self, api):
+        client = self.make_client(api)
+        return VimeoUploader(client, client.vimeo_videos_upload_getTicket())
+
+    def test_chunks_are_verified(self):
+        uploader = self.make_uploader(UploadAPI())
+        uploader.upload(self.make_file("video", 250), chunk=True,
+                        chunk_size=100)
+        self.assertEqual(uploader.chunk_sizes, [100, 100, 50])
+
+    def test_unchunked_uploads_are_verified(self):
+        uploader = self.make_uploader(UploadAPI())
+        uploader.upload(self.make_file("video", 250))
+        self.assertEqual(uploader.chunk_sizes, [250])
+
+    def test_adaptive_chunks_are_verified(self):
+        sent = []
+        uploader = self.make_uploader(UploadAPI())
+        uploader.upload(self.make_file("video", 5000), chunk=True,
+                        chunk_size=100, adaptive=True, min_chunk_size=100,
+                        max_chunk_size=800,
+                        chunk_complete_hook=lambda info : sent.append(info))
+        self.assertEqual(uploader.chunk_sizes,
+                         [info["chunk_size"] for info in sent])
+        self.assertEqual(sent[-1]["bytes_sent"], 5000)
+        self.assertTrue(max(uploader.chunk_sizes) <= 800)
+
+    def test_missing_chunks_raise(self):
+        api = UploadAPI()
+        api.lose_chunk = 1
+        uploader = self.make_uploader(api)
+        self.assertRaises(VimeoError, uploader.upload,
+                          self.make_file("video", 250), chunk=True,
+                          chunk_size=100)
+
+    def test_reads_xml_verification(self):
+        verified = etree.fromstring('<ticket id="t1"><chunks>'
+                                    '<chunk id="1" size="50"/>'
+                                    '<chunk id="0" size="100"/>'
+                                    '</chunks></ticket>')
+        self.assertEqual(_verified_chunks(verified), [(0, 100), (1, 50)])
@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+try:
+    # python 2.6
+    import json
+except ImportError:
+    import simplejson as json
+
+from vimeo import VimeoClient, VimeoError
+from vimeo.export import Exporter
+from vimeo.test.stubs import StubTransport, json_response
+
+
+class Library(object):
+    """
+    Answers the video listing and details calls for a library of videos.
+    fail_page makes listing that page fail once.
+    """
+    def __init__(self, videos):
+        self.videos = ["v{0}".format(number) for number in range(videos)]
+        self.fail_page = None
+
+    def __call__(self, source, method, url, params, body_size):
+        method = params["method"]
+        if method == "vimeo.videos.getAll":
+            page, per_page = int(params["page"]), int(params["per_page"])
+            if page == self.fail_page:
+                self.fail_page = None
+                raise RuntimeError("Connection reset")
+            ids = self.videos[(page - 1) * per_page:page * per_page]
+            return json_response("videos", {
+                                    "page" : str(page),
+                                    "total" : str(len(self.videos)),
+                                    "video" : [{"id" : id} for id in ids]})
+        elif method == "vimeo.videos.getInfo":
+            video_id = params["video_id"]
+            return json_response("video", [{"id" : video_id,
+                                            "title" : "Video " + video_id}])
+        raise AssertionError("Unexpected call to {0}".format(method))
+
+
+class TestExporter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "videos.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def exporter(self, library, user_id="7", workers=4, **kwargs):
+        transport = StubTransport(library)
+        make_client = lambda : VimeoClient(key="key", secret="secret",
+                                           format="json", cache_timeout=0,
+                                           transport=transport)
+        kwargs.setdefault("per_page", 3)
+        return Exporter(make_client, user_id, self.directory,
+                        sections=("videos",), workers=workers, **kwargs)
+
+    def export(self, library, **kwargs):
+        self.exporter(library, **kwargs).run()
+
+    def exported(self):
+        with open(self.path) as output:
+            return [json.loads(line) for line in output]
+
+    def test_details_match_their_videos(self):
+        library = Library(40)
+        self.export(library, workers=8)
+        videos = self.exported()
+        self.assertEqual([video["id"] for video in videos], library.videos)
+        for video in videos:
+            self.assertEqual(video["title"], "Video " + video["id"])
+
+    def test_resumes_after_the_last_checkpoint(self):
+        library = Library(10)
+        library.fail_page = 3
+        self.assertRaises(RuntimeError, self.export, library)
+        # a page that was half written when the export was interrupted
+        with open(self.path, "ab") as output:
+            output.write('{"id" : "v6", "title" : "Vid')
+
+        self.export(library)
+        videos = self.exported()
+        self.assertEqual([video["id"] for video in videos], library.videos)
+        for video in videos:
+            self.assertEqual(video["title"], "Video " + video["id"])
+
+    def test_checkpoints_are_only_resumed_with_the_same_options(self):
+        library = Library(10)
+        library.fail_page = 2
+        self.assertRaises(RuntimeError, self.export, library)
+        self.assertRaises(VimeoError, self.exporter, library, per_page=5)
+        self.assertRaises(VimeoError, self.exporter, library, format="csv")
+        self.assertRaises(VimeoError, self.exporter, library, user_id="8")
+
+        self.export(library)
+        self.assertEqual([video["id"] for video in self.exported()],
+                         library.videos)
@@ -0,0 +1,96 @@
+import unittest
+
+from vimeo import VimeoClient, VimeoAPIError
+from vimeo.lazy import LazyVideo
+from vimeo.test.stubs import StubTransport, json_response, json_error
+
+
+class Listing(object):
+    """
+    Lists v1 and v2 as summaries, or in full with full_response (where v2 has
+    dropped off the page, so has to be fetched with videos.getInfo). The
+    first fail_full full listings fail.
+    """
+    def __init__(self):
+        self.fail_full = 0
+
+    def __call__(self, source, method, url, params, body_size):
+        if "full_response" in params and self.fail_full:
+            self.fail_full -= 1
+            return json_error("900", "Internal error")
+        return listing(params)
+
+def listing(params):
+    if params["format"] == "xml":
+        return ('<rsp stat="ok"><videos page="1" total="1">'
+                '<video id="v1"><title>Video v1</title></video>'
+                '</videos></rsp>')
+
+    if params["method"] == "vimeo.videos.getInfo":
+        return json_response("video", [{"id" : params["video_id"],
+                                         "title" : "Video",
+                                         "number_of_plays" : "2"}])
+    if "full_response" in params:
+        videos = [{"id" : "v1", "title" : "Video v1",
+                   "number_of_plays" : "1"}]
+    else:
+        videos = [{"id" : "v1", "title" : "Video v1"},
+                  {"id" : "v2", "title" : "Video v2"}]
+    return json_response("videos", {"page" : "1", "total" : "2",
+                                    "video" : videos})
+
+
+class TestLean(unittest.TestCase):
+    def client(self, **kwargs):
+        self.listing = Listing()
+        self.transport = StubTransport(self.listing)
+        return VimeoClient(key="key", secret="secret",
+                           transport=self.transport, lean=True, **kwargs)
+
+    def sent(self, name):
+        return [params.get(name) for _, _, _, params in self.transport.requests]
+
+    def test_upgrades_on_missing_fields(self):
+        client = self.client(format="json")
+        first, second = client.vimeo_videos_getAll(user_id="7")["video"]
+        self.assertTrue(isinstance(first, LazyVideo))
+        self.assertEqual(first["title"], "Video v1")
+        self.assertEqual(self.sent("summary_response"), [1])
+
+        self.assertEqual(first["number_of_plays"], "1")
+        self.assertEqual(second.get("number_of_plays"), "2")
+        self.assertEqual(second.get("missing"), None)
+        self.assertEqual(self.transport.methods(),
+                         ["vimeo.videos.getAll", "vimeo.videos.getAll",
+                          "vimeo.videos.getInfo"])
+        self.assertEqual(self.sent("full_response"), [None, 1, None])
+
+    def test_failed_upgrades_are_retried_for_the_page(self):
+        client = self.client(format="json")
+        first, second = client.vimeo_videos_getAll(user_id="7")["video"]
+        self.listing.fail_full = 2
+        self.assertRaises(VimeoAPIError, first.__getitem__, "number_of_plays")
+        self.assertRaises(VimeoAPIError, first.get, "number_of_plays", "0")
+        self.assertEqual(first["number_of_plays"], "1")
+        # the full page was fetched, only v2 needs a getInfo
+        self.assertEqual(second["number_of_plays"], "2")
+        self.assertEqual(self.transport.methods().count(
+                                                "vimeo.videos.getInfo"), 1)
+        self.assertEqual(self.sent("full_response"), [None, 1, 1, 1, None])
+
+    def test_can_be_turned_off_per_call(self):
+        client = self.client(format="json")
+        videos = client.vimeo_videos_getAll(user_id="7", lean=False)["video"]
+        self.assertFalse(isinstance(videos[0], LazyVideo))
+        self.assertEqual(self.sent("summary_response"), [None])
+
+    def test_skipped_for_compact_clients(self):
+        client = self.client(format="json", compact=True)
+        page = client.vimeo_videos_getAll(user_id="7")
+        self.assertEqual(page[0].title, "Video v1")
+        self.assertEqual(self.sent("summary_response"), [None])
+
+    def test_skipped_for_xml(self):
+        client = self.client(format="xml")
+        client.vimeo_videos_getAll(user_id="7")
+        self.assertEqual(self.sent("summary_response"), [None])
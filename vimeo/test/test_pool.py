@@ -0,0 +1,107 @@
+import threading
+import time
+import unittest
+import urlparse
+
+from vimeo.pool import ConnectionPool, VimeoClientPool
+from vimeo.test.stubs import json_response, json_error
+
+
+class FakeHttp(object):
+    """
+    Stands in for httplib2.Http. Private videos are only visible with a token,
+    and each video's response says which token it was fetched with.
+    """
+    lock = threading.Lock()
+    requests = []
+
+    def request(self, uri, method="GET", body=None, headers=None):
+        params = dict(urlparse.parse_qsl(urlparse.urlsplit(uri).query))
+        token = params.get("oauth_token")
+        with self.lock:
+            self.requests.append((params.get("video_id"), token))
+        if params.get("video_id", "").startswith("private") and not token:
+            return {"status" : "200"}, json_error("1", "Video not found")
+        video = {"id" : params.get("video_id"), "fetched_with" : token}
+        return {"status" : "200"}, json_response("video", [video])
+
+
+class TestVimeoClientPool(unittest.TestCase):
+    def setUp(self):
+        FakeHttp.requests = []
+        self.pool = VimeoClientPool(key="key", secret="secret", format="json",
+                                    http_factory=FakeHttp, max_views=3)
+
+    def test_views_are_reused(self):
+        view = self.pool.get_client("token", "secret")
+        self.assertTrue(self.pool.get_client("token", "secret") is view)
+        self.assertTrue(self.pool.get_client("token", "other") is not view)
+
+    def test_evicts_least_recently_used(self):
+        for age, token in enumerate(("a", "b", "c")):
+            self.pool.get_client(token, "secret").last_used -= 10 - age
+        self.pool.get_client("a", "secret")
+        self.pool.get_client("d", "secret")
+        self.assertEqual(sorted(self.pool._views), ["a", "c", "d"])
+
+    def test_cleanup_drops_idle_views(self):
+        self.pool.get_client("a", "secret").last_used -= 60
+        self.pool.get_client("b", "secret")
+        self.pool.idle_timeout = 30
+        self.pool.cleanup()
+        self.assertEqual(list(self.pool._views), ["b"])
+
+    def test_public_calls_are_shared(self):
+        first = self.pool.get_client("a", "secret")
+        second = self.pool.get_client("b", "secret")
+        video = first.vimeo_videos_getInfo(video_id="1")
+        self.assertTrue(second.vimeo_videos_getInfo(video_id="1") is video)
+        self.assertEqual(video[0]["fetched_with"], None)
+        self.assertEqual(FakeHttp.requests, [("1", None)])
+
+    def test_private_calls_fall_back_to_the_token(self):
+        first = self.pool.get_client("a", "secret")
+        second = self.pool.get_client("b", "secret")
+        mine = first.vimeo_videos_getInfo(video_id="private")
+        theirs = second.vimeo_videos_getInfo(video_id="private")
+        self.assertEqual(mine[0]["fetched_with"], "a")
+        self.assertEqual(theirs[0]["fetched_with"], "b")
+        # the second view skips the public attempt, it's known to fail
+        self.assertEqual(FakeHttp.requests, [("private", None),
+                                             ("private", "a"),
+                                             ("private", "b")])
+
+    def test_calls_without_the_shared_parameter_use_the_token(self):
+        view = self.pool.get_client("a", "secret")
+        view.vimeo_people_getInfo()
+        self.assertEqual(FakeHttp.requests, [(None, "a")])
+
+
+class TestConnectionPool(unittest.TestCase):
+    def test_bounded_concurrent_requests(self):
+        state = {"created" : 0, "active" : 0, "most_active" : 0}
+        lock = threading.Lock()
+
+        class SlowHttp(object):
+            def __init__(self):
+                with lock:
+                    state["created"] += 1
+
+            def request(self, *args, **kwargs):
+                with lock:
+                    state["active"] += 1
+                    state["most_active"] = max(state["most_active"],
+                                               state["active"])
+                time.sleep(0.01)
+                with lock:
+                    state["active"] -= 1
+
+        connections = ConnectionPool(3, http_factory=SlowHttp)
+        threads = [threading.Thread(target=connections.request, args=("u",))
+                   for _ in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(state["created"], 3)
+        self.assertEqual(state["most_active"], 3)
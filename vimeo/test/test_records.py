@@ -0,0 +1,79 @@
+import pickle
+import unittest
+
+import xml.etree.ElementTree as etree
+
+from vimeo import records
+
+
+VIDEO = {"id" : "1",
+         "title" : "A video",
+         "privacy" : "anybody",
+         "is_hd" : "1",
+         "owner" : {"id" : "7", "username" : "someone", "is_plus" : "0"},
+         "thumbnails" : {"thumbnail" : [{"width" : "100", "height" : "75",
+                                         "_content" : "http://thumb/1.jpg"}]}}
+
+class TestRecords(unittest.TestCase):
+    def test_from_json(self):
+        video = records.from_json("video", [VIDEO])[0]
+        self.assertEqual(video.title, "A video")
+        self.assertEqual(video.owner.username, "someone")
+        self.assertEqual(video.thumbnails[0].url, "http://thumb/1.jpg")
+        self.assertEqual(video.description, None)
+
+    def test_from_element(self):
+        element = etree.fromstring(
+            '<video id="1" privacy="anybody"><title>A video</title>'
+            '<owner id="7" username="someone"/><thumbnails>'
+            '<thumbnail width="100" height="75">http://thumb/1.jpg</thumbnail>'
+            '</thumbnails></video>')
+        video = records.from_element(element)
+        self.assertEqual(video.title, "A video")
+        self.assertEqual(video.owner.username, "someone")
+        self.assertEqual(video.thumbnails[0].width, "100")
+
+    def test_page(self):
+        page = records.from_json("videos", {"page" : "2", "total" : "11",
+                                            "video" : [VIDEO, VIDEO]})
+        self.assertEqual(page.page, "2")
+        self.assertEqual(len(page), 2)
+        self.assertEqual(page[1], page[0])
+
+    def test_unknown_roots_are_unchanged(self):
+        quota = {"upload_space" : {"free" : "10"}}
+        self.assertTrue(records.from_json("user", quota) is quota)
+
+    def test_interns_only_low_cardinality_fields(self):
+        first = records.from_json("video", VIDEO)
+        # an equal but distinct string
+        second = records.from_json("video", dict(VIDEO,
+                                                 privacy="".join("anybody")))
+        self.assertTrue(first.privacy is second.privacy)
+        self.assertTrue("someone" not in records._strings)
+        self.assertTrue("A video" not in records._strings)
+
+    def test_keeps_fields_without_slots(self):
+        data = dict(VIDEO, urls={"url" : [{"type" : "video",
+                                           "_content" : "http://vimeo.com/1"}]},
+                    is_like="0")
+        video = records.from_json("video", data)
+        self.assertEqual(video.urls, data["urls"])
+        self.assertEqual(video.is_like, "0")
+        self.assertEqual(video._asdict()["urls"], data["urls"])
+        self.assertEqual(records.from_json("video", VIDEO).extra, None)
+        self.assertRaises(AttributeError, getattr, video, "tags")
+
+        copy = pickle.loads(pickle.dumps(video, pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(copy, video)
+        self.assertEqual(copy.is_like, "0")
+
+    def test_keeps_elements_without_slots(self):
+        element = etree.fromstring(
+            '<video id="1" is_like="1"><title>A video</title>'
+            '<upload_source>web</upload_source>'
+            '<tags><tag id="5">cats</tag></tags></video>')
+        video = records.from_element(element)
+        self.assertEqual(video.is_like, "1")
+        self.assertEqual(video.upload_source, "web")
+        self.assertEqual(video.tags.find("tag").text, "cats")
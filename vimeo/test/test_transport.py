@@ -0,0 +1,95 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from vimeo import API_REST_URL, VimeoClient
+from vimeo.transport import (RecordingTransport, ReplayError, ReplayTransport,
+                             percentile, read_recording, replay)
+from vimeo.test.stubs import json_response, json_error
+
+
+class TestPercentile(unittest.TestCase):
+    def test_nearest_rank(self):
+        ordered = range(1, 11)
+        self.assertEqual(percentile(ordered, 0.5), 5)
+        self.assertEqual(percentile(ordered, 0.9), 9)
+        self.assertEqual(percentile(ordered, 0.99), 10)
+        self.assertEqual(percentile(ordered, 0), 1)
+        self.assertEqual(percentile(ordered, 1), 10)
+
+    def test_small_lists(self):
+        self.assertEqual(percentile([], 0.5), None)
+        self.assertEqual(percentile([3], 0.99), 3)
+        self.assertEqual(percentile([1, 2], 0.5), 1)
+
+
+class TestRecording(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "traffic.jsonl.gz")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def record(self, responses, method="vimeo.videos.getInfo",
+               param="video_id"):
+        """
+        Records a call for each (value of param, content).
+        """
+        transport = RecordingTransport(self.path)
+        for value, content in responses:
+            params = {"format" : "json", "method" : method, param : value,
+                      "oauth_nonce" : "123"}
+            transport.request("api", "GET", API_REST_URL, params,
+                              lambda : ({"status" : "200"}, content),
+                              {"Authorization" : "OAuth secret"})
+        transport.close()
+
+    def test_round_trip(self):
+        self.record([("1", json_response("video", [{"id" : "1"}])),
+                     ("1", json_response("video", [{"id" : "1", "v" : "2"}]))])
+
+        entry = list(read_recording(self.path))[0]
+        self.assertEqual(entry["params"], [["format", "json"],
+                                           ["method", "vimeo.videos.getInfo"],
+                                           ["video_id", "1"]])
+        self.assertEqual(entry["headers"], {})
+
+        client = VimeoClient(key="key", secret="secret", format="json",
+                             cache_timeout=0,
+                             transport=ReplayTransport(self.path))
+        self.assertEqual(client.vimeo_videos_getInfo(video_id="1"),
+                         [{"id" : "1"}])
+        # repeated calls get the responses in order, then the last one again
+        for _ in range(2):
+            self.assertEqual(client.vimeo_videos_getInfo(video_id="1"),
+                             [{"id" : "1", "v" : "2"}])
+        self.assertRaises(ReplayError, client.vimeo_videos_getInfo,
+                          video_id="2")
+
+    def test_replay_counts_every_failure(self):
+        self.record([("1", json_response("video", [{"id" : "1"}])),
+                     ("2", json_error("1", "Video not found")),
+                     ("3", "<html>not json</html>")])
+
+        report = replay(self.path, workers=2, key="key", secret="secret",
+                        format="json")
+        self.assertEqual(report["requests"], 3)
+        self.assertEqual(report["errors"], 2)
+        self.assertTrue(report["latency"]["max"] is not None)
+
+    def test_non_ascii_params(self):
+        query = u"caf\xe9".encode("utf-8")
+        self.record([(query, json_response("videos", {"video" : []}))],
+                    method="vimeo.videos.search", param="query")
+
+        client = VimeoClient(key="key", secret="secret", format="json",
+                             transport=ReplayTransport(self.path))
+        self.assertEqual(client.vimeo_videos_search(query=query),
+                         {"video" : []})
+
+        report = replay(self.path, workers=1, key="key", secret="secret",
+                        format="json")
+        self.assertEqual(report["requests"], 1)
+        self.assertEqual(report["errors"], 0)
@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Transports that the clients and the uploader make their HTTP requests
+through, which allow recording real traffic and replaying it later without
+talking to Vimeo.
+
+To record, pass a RecordingTransport to the client (uploaders use their
+client's transport):
+
+    transport = RecordingTransport("traffic.jsonl.gz")
+    v = VimeoClient(key, secret, transport=transport)
+    ...
+    transport.close()
+
+A recording can then be served back by a ReplayTransport, or replayed as a
+load test with the replay function, which reissues the recorded API and
+oEmbed calls from a number of threads (optionally at the recorded pace) and
+reports the throughput and latencies it saw:
+
+    print replay("traffic.jsonl.gz", workers=16, speed=10)
+
+Only the requests that were actually sent are recorded, so calls answered
+from a client's cache won't show up in a recording.
+"""
+
+import base64
+import gzip
+import math
+import Queue
+import threading
+import time
+
+try:
+    # python 2.6
+    import json
+except ImportError:
+    import simplejson as json
+
+from httplib2 import Response
+
+from . import VimeoError
+
+# request headers that shouldn't end up in a recording
+PRIVATE_HEADERS = ("authorization",)
+
+class ReplayError(VimeoError):
+    """
+    Exception raised when replaying a request that wasn't recorded.
+    """
+    pass
+
+def normalize_params(params):
+    """
+    Returns the request parameters as a sorted list of (name, value) pairs,
+    leaving out the OAuth parameters (nonce, timestamp, signature, etc.), so
+    that the same call always produces the same parameters.
+    """
+    normalized = []
+    for name, value in params.items():
+        if name.startswith("oauth_"):
+            continue
+        if not isinstance(value, basestring):
+            value = str(value)
+        normalized.append((name, value))
+    return sorted(normalized)
+
+def _request_key(source, method, url, params):
+    # values are utf-8 strs when requested, unicode when read back from a
+    # recording
+    return (source, method, url,
+            tuple((name, value if isinstance(value, unicode)
+                               else value.decode("utf-8"))
+                  for name, value in params))
+
+def _encode_params(params):
+    """
+    Returns recorded parameters as a dict of utf-8 strs, which is what the
+    clients are called with (and can urlencode).
+    """
+    return dict((name.encode("utf-8"), value.encode("utf-8"))
+                for name, value in params)
+
+
+class Transport(object):
+    """
+    Performs requests directly. This is what clients use by default.
+    """
+    def request(self, source, method, url, params, send, headers=None,
+                body_size=None):
+        """
+        Performs a request.
+
+        source names what's making the request ("api", "oembed" or
+        "upload"), url is the request url (without a query string), params
+        are the request's parameters and send is a callable which actually
+        performs the request and returns a (response, content) tuple. For
+        uploads, body_size is the size of the uploaded data.
+        """
+        return send()
+
+
+class RecordingTransport(Transport):
+    """
+    Performs requests directly, writing each one along with its response
+    and latency to a gzipped file with one JSON object per line.
+
+    Safe to share between clients and threads.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = gzip.open(path, "wb")
+        self._lock = threading.Lock()
+        self._started = time.time()
+
+    def request(self, source, method, url, params, send, headers=None,
+                body_size=None):
+        started = time.time()
+        response, content = send()
+        latency = time.time() - started
+
+        entry = {"source" : source,
+                 "method" : method,
+                 "url" : url,
+                 "params" : normalize_params(params),
+                 "headers" : dict((name, value)
+                                  for name, value in (headers or {}).items()
+                                  if name.lower() not in PRIVATE_HEADERS),
+                 "offset" : started - self._started,
+                 "latency" : latency,
+                 "response" : dict(response)}
+        if body_size is not None:
+            entry["body_size"] = body_size
+        try:
+            entry["content"] = content.decode("utf-8")
+        except UnicodeDecodeError:
+            entry["content_base64"] = base64.b64encode(content)
+
+        line = json.dumps(entry, separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
+        return response, content
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class ReplayTransport(Transport):
+    """
+    Answers requests from a recording made by a RecordingTransport, without
+    making any actual requests.
+
+    Repeated requests get their recorded responses in order (the last one is
+    reused once they run out). If speed is given, each response is delayed
+    by its recorded latency divided by speed.
+
+    Safe to share between clients and threads.
+    """
+    def __init__(self, path, speed=None):
+        self.path = path
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._responses = {}
+        for entry in read_recording(path):
+            key = _request_key(entry["source"], entry["method"],
+                               entry["url"], entry["params"])
+            self._responses.setdefault(key, []).append(entry)
+
+    def request(self, source, method, url, params, send, headers=None,
+                body_size=None):
+        key = _request_key(source, method, url, normalize_params(params))
+        with self._lock:
+            entries = self._responses.get(key)
+            if not entries:
+                raise ReplayError(
+                    "No recorded response for {0} {1}.".format(method, url))
+            entry = entries.pop(0) if len(entries) > 1 else entries[0]
+
+        if self.speed:
+            time.sleep(entry["latency"] / self.speed)
+
+        if "content_base64" in entry:
+            content = base64.b64decode(entry["content_base64"])
+        else:
+            content = entry["content"].encode("utf-8")
+        return Response(entry["response"]), content
+
+
+def read_recording(path):
+    """
+    Yields the entries of a recording in the order they were recorded.
+    """
+    recording = gzip.open(path, "rb")
+    try:
+        for line in recording:
+            yield json.loads(line)
+    finally:
+        recording.close()
+
+def percentile(ordered, fraction):
+    """
+    Returns the value at the given fraction of a sorted list (nearest rank).
+    """
+    if not ordered:
+        return None
+    index = int(math.ceil(fraction * len(ordered))) - 1
+    return ordered[min(len(ordered) - 1, max(0, index))]
+
+def replay(path, workers=8, speed=None, **client_kwargs):
+    """
+    Replays the API and oEmbed calls in a recording through new clients
+    backed by a ReplayTransport, and returns a report of how it went.
+
+    Each worker thread gets its own clients (created with any extra keyword
+    arguments given). If speed is given, calls are started at their recorded
+    offsets and responses take their recorded latency, both divided by speed
+    (so 1 is the original pace). Otherwise calls run as fast as possible.
+
+    Uploads aren't replayed here, since their files aren't recorded, but an
+    uploader whose client uses a ReplayTransport will be answered from the
+    recording as well.
+    """
+    from . import VimeoClient
+    from oembed import VimeoOEmbedClient
+
+    transport = ReplayTransport(path, speed=speed)
+    calls = Queue.Queue()
+    for entry in read_recording(path):
+        if entry["source"] in ("api", "oembed"):
+            calls.put(entry)
+
+    lock = threading.Lock()
+    latencies, errors = [], []
+
+    def _work():
+        client = VimeoClient(transport=transport, **client_kwargs)
+        oembed_client = VimeoOEmbedClient(transport=transport)
+        while True:
+            try:
+                entry = calls.get_nowait()
+            except Queue.Empty:
+                return
+
+            if speed:
+                delay = started + entry["offset"] / speed - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+
+            params = _encode_params(entry["params"])
+            call_started = time.time()
+            try:
+                if entry["source"] == "api":
+                    method = params.pop("method").replace(".", "_")
+                    getattr(client, method)(**params)
+                else:
+                    format = entry["url"].rpartition(".")[2]
+                    oembed_client.get_oembed(format=format, **params)
+            except Exception as error:
+                # anything a call raises (including unparseable responses)
+                # counts as an error, the rest of the replay carries on
+                with lock:
+                    errors.append(error)
+            with lock:
+                latencies.append(time.time() - call_started)
+
+    started = time.time()
+    threads = [threading.Thread(target=_work) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - started
+
+    latencies.sort()
+    return {"requests" : len(latencies),
+            "errors" : len(errors),
+            "elapsed" : elapsed,
+            "throughput" : len(latencies) / elapsed if elapsed else 0,
+            "latency" : {"p50" : percentile(latencies, 0.5),
+                         "p90" : percentile(latencies, 0.9),
+                         "p99" : percentile(latencies, 0.99),
+                         "max" : latencies[-1] if latencies else None}}